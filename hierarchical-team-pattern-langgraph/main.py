@@ -17,6 +17,7 @@ Architecture:
 """
 
 import os
+import re
 from typing import Literal
 from dotenv import load_dotenv
 from langchain_core.tools import tool
@@ -187,9 +188,25 @@ def meeting_agent_node(state: HierarchicalState) -> dict:
 # Team Supervisors (Middle Level)
 # ============================================================================
 
-def communication_supervisor_node(state: HierarchicalState) -> dict:
-    """Communication team supervisor - routes to email or slack agents"""
-    system_prompt = """You are the Communication Team Supervisor.
+# Every routing word any supervisor can answer with, matched in one pass
+ROUTE_WORD_RE = re.compile(
+    r"\b(communication|scheduling|email|slack|calendar|meeting|finish)\b", re.IGNORECASE
+)
+
+def parse_route(content: str, choices: tuple[str, ...]) -> str:
+    """
+    First routing word in a supervisor reply that this supervisor offers, or
+    FINISH when the reply leads with FINISH (or names nothing it offers).
+    """
+    for match in ROUTE_WORD_RE.finditer(content):
+        word = match.group(1).lower()
+        if word == "finish":
+            return "FINISH"
+        if word in choices:
+            return word
+    return "FINISH"
+
+COMMUNICATION_SUPERVISOR_PROMPT = """You are the Communication Team Supervisor.
     
 Your team handles all communication tasks:
 - email: For sending emails
@@ -203,25 +220,21 @@ If the user's request needs Slack and it hasn't been posted yet, respond with "s
 
 Respond with ONLY ONE of: "email", "slack", or "FINISH"."""
 
-    messages = [SystemMessage(content=system_prompt)] + state["messages"]
+_COMMUNICATION_SUPERVISOR_SYS_MSG = SystemMessage(content=COMMUNICATION_SUPERVISOR_PROMPT)
+
+def communication_supervisor_node(state: HierarchicalState) -> dict:
+    """Communication team supervisor - routes to email or slack agents"""
+    messages = [_COMMUNICATION_SUPERVISOR_SYS_MSG] + state["messages"]
     response = model.invoke(messages)
     
-    content = response.content.strip().lower()
-    if "email" in content:
-        next_agent = "email"
-    elif "slack" in content:
-        next_agent = "slack"
-    else:
-        next_agent = "FINISH"
+    next_agent = parse_route(response.content, ("email", "slack"))
     
     return {
         "messages": [response],
         "next_agent": next_agent
     }
 
-def scheduling_supervisor_node(state: HierarchicalState) -> dict:
-    """Scheduling team supervisor - routes to calendar or meeting agents"""
-    system_prompt = """You are the Scheduling Team Supervisor.
+SCHEDULING_SUPERVISOR_PROMPT = """You are the Scheduling Team Supervisor.
     
 Your team handles all scheduling tasks:
 - calendar: For creating calendar events and appointments
@@ -235,16 +248,14 @@ If the user's request needs room booking and it hasn't been done yet, respond wi
 
 Respond with ONLY ONE of: "calendar", "meeting", or "FINISH"."""
 
-    messages = [SystemMessage(content=system_prompt)] + state["messages"]
+_SCHEDULING_SUPERVISOR_SYS_MSG = SystemMessage(content=SCHEDULING_SUPERVISOR_PROMPT)
+
+def scheduling_supervisor_node(state: HierarchicalState) -> dict:
+    """Scheduling team supervisor - routes to calendar or meeting agents"""
+    messages = [_SCHEDULING_SUPERVISOR_SYS_MSG] + state["messages"]
     response = model.invoke(messages)
     
-    content = response.content.strip().lower()
-    if "calendar" in content:
-        next_agent = "calendar"
-    elif "meeting" in content:
-        next_agent = "meeting"
-    else:
-        next_agent = "FINISH"
+    next_agent = parse_route(response.content, ("calendar", "meeting"))
     
     return {
         "messages": [response],
@@ -255,9 +266,7 @@ Respond with ONLY ONE of: "calendar", "meeting", or "FINISH"."""
 # Top Supervisor (Top Level)
 # ============================================================================
 
-def top_supervisor_node(state: HierarchicalState) -> dict:
-    """Top supervisor - routes to team supervisors"""
-    system_prompt = """You are the Top-Level Supervisor coordinating specialized teams.
+TOP_SUPERVISOR_PROMPT = """You are the Top-Level Supervisor coordinating specialized teams.
 
 Your teams:
 - communication: Handles emails and Slack messages (managed by Communication Team Supervisor)
@@ -274,16 +283,14 @@ DECISION RULES:
 
 Respond with ONLY ONE of: "communication", "scheduling", or "FINISH"."""
 
-    messages = [SystemMessage(content=system_prompt)] + state["messages"]
+_TOP_SUPERVISOR_SYS_MSG = SystemMessage(content=TOP_SUPERVISOR_PROMPT)
+
+def top_supervisor_node(state: HierarchicalState) -> dict:
+    """Top supervisor - routes to team supervisors"""
+    messages = [_TOP_SUPERVISOR_SYS_MSG] + state["messages"]
     response = model.invoke(messages)
     
-    content = response.content.strip().lower()
-    if "communication" in content:
-        next_team = "communication"
-    elif "scheduling" in content:
-        next_team = "scheduling"
-    else:
-        next_team = "FINISH"
+    next_team = parse_route(response.content, ("communication", "scheduling"))
     
     return {
         "messages": [response],
@@ -406,8 +413,6 @@ def main():
     print("HIERARCHICAL TEAMS PATTERN DEMO")
     print("="*80 + "\n")
     
-    graph = create_hierarchical_graph()
-    
     # Example 1: Communication task
     print("Example 1: Communication Task")
     print("-" * 80)
@@ -1,14 +1,12 @@
 """Simple test to verify the hierarchical pattern works"""
 
-from main import create_hierarchical_graph
+from main import graph
 from langchain_core.messages import HumanMessage
 
 def test_hierarchical():
     """Test the hierarchical graph"""
     print("\n🧪 Testing Hierarchical Teams Pattern\n")
     
-    graph = create_hierarchical_graph()
-    
     query = "Send an email to john@example.com about the meeting"
     print(f"Query: {query}\n")
     
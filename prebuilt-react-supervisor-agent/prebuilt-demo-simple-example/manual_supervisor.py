@@ -11,6 +11,7 @@ Use Case: Travel Booking Assistant (Same as prebuilt)
 """
 
 import os
+import re
 from typing import Annotated, Literal
 from pathlib import Path
 from dotenv import load_dotenv
@@ -100,12 +101,7 @@ def hotel_agent_node(state: SupervisorState) -> dict:
 # Supervisor Node (Manual - need to implement routing logic)
 # ============================================================================
 
-def supervisor_node(state: SupervisorState) -> dict:
-    """
-    Supervisor decides which agent to route to.
-    This is what create_supervisor does automatically!
-    """
-    system_prompt = """You are a travel coordinator managing flight and hotel booking assistants.
+SUPERVISOR_PROMPT = """You are a travel coordinator managing flight and hotel booking assistants.
 
 Your team:
 - flight: Handles flight searches and bookings
@@ -117,17 +113,28 @@ Respond with ONLY ONE of: "flight", "hotel", or "FINISH" (if task is complete).
 Look at the conversation history. If an assistant has completed their task, 
 decide what to do next or finish."""
 
-    messages = [SystemMessage(content=system_prompt)] + state["messages"]
+_SUPERVISOR_SYS_MSG = SystemMessage(content=SUPERVISOR_PROMPT)
+
+# Whole words only, so "flights" or "hotels" in a reply never count as a choice
+ROUTE_WORD_RE = re.compile(r"\b(flight|hotel|finish)\b", re.IGNORECASE)
+
+def parse_route(content: str) -> str:
+    """First routing word in the supervisor's reply, or FINISH if it names none"""
+    match = ROUTE_WORD_RE.search(content)
+    if match is None or match.group(1).lower() == "finish":
+        return "FINISH"
+    return match.group(1).lower()
+
+def supervisor_node(state: SupervisorState) -> dict:
+    """
+    Supervisor decides which agent to route to.
+    This is what create_supervisor does automatically!
+    """
+    messages = [_SUPERVISOR_SYS_MSG] + state["messages"]
     response = model.invoke(messages)
     
     # Parse response to determine routing
-    content = response.content.strip().lower()
-    if "flight" in content:
-        next_agent = "flight"
-    elif "hotel" in content:
-        next_agent = "hotel"
-    else:
-        next_agent = "FINISH"
+    next_agent = parse_route(response.content)
     
     return {
         "messages": [response],
@@ -26,6 +26,9 @@ Shared State Flow:
 """
 
 import os
+import re
+import functools
+import time
 from typing import Annotated, Literal
 from pathlib import Path
 from dotenv import load_dotenv
@@ -204,6 +207,43 @@ def save_research_results(
 # Tools
 # ============================================================================
 
+# Researchers often repeat a query within a run; successful lookups are
+# memoized (errors raise, so they are never cached and get retried). Entries
+# only live for one SEARCH_CACHE_TTL window, so a long-lived server process
+# doesn't keep serving stale results for "latest news" style queries.
+SEARCH_CACHE_TTL = 300  # seconds
+
+@functools.lru_cache(maxsize=256)
+def _tavily_search(query: str, ttl_window: int) -> str:
+    """Call the Tavily API and format the results (ttl_window only keys the cache)"""
+    url = "https://api.tavily.com/search"
+    payload = {
+        "api_key": TAVILY_API_KEY,
+        "query": query,
+        "max_results": 3,
+        "search_depth": "basic",
+        "include_answer": True,
+        "include_raw_content": False
+    }
+    
+    response = requests.post(url, json=payload, timeout=10)
+    response.raise_for_status()
+    data = response.json()
+    
+    # Format results
+    results = []
+    if "results" in data:
+        for i, result in enumerate(data["results"][:3], 1):
+            title = result.get("title", "No title")
+            content = result.get("content", "No content")
+            url = result.get("url", "No URL")
+            results.append(f"**Source {i}: {title}**\n{content}\nURL: {url}\n")
+    
+    if "answer" in data and data["answer"]:
+        results.insert(0, f"**Quick Answer:** {data['answer']}\n")
+    
+    return "\n".join(results) if results else "No results found."
+
 @tool
 def web_search(query: str) -> str:
     """Search the web for information using Tavily API.
@@ -218,35 +258,7 @@ def web_search(query: str) -> str:
         return "Web search unavailable: No Tavily API key configured. Get one free at https://tavily.com"
     
     try:
-        # Call Tavily API directly
-        url = "https://api.tavily.com/search"
-        payload = {
-            "api_key": TAVILY_API_KEY,
-            "query": query,
-            "max_results": 3,
-            "search_depth": "basic",
-            "include_answer": True,
-            "include_raw_content": False
-        }
-        
-        response = requests.post(url, json=payload, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        
-        # Format results
-        results = []
-        if "results" in data:
-            for i, result in enumerate(data["results"][:3], 1):
-                title = result.get("title", "No title")
-                content = result.get("content", "No content")
-                url = result.get("url", "No URL")
-                results.append(f"**Source {i}: {title}**\n{content}\nURL: {url}\n")
-        
-        if "answer" in data and data["answer"]:
-            results.insert(0, f"**Quick Answer:** {data['answer']}\n")
-        
-        return "\n".join(results) if results else "No results found."
-        
+        return _tavily_search(query, int(time.monotonic() // SEARCH_CACHE_TTL))
     except requests.exceptions.Timeout:
         return "Web search timed out. Please try again."
     except requests.exceptions.RequestException as e:
@@ -279,6 +291,11 @@ IMPORTANT:
 When done, confirm what you found and list the sources.""",
 )
 
+# Sections of the analysis reply, each found in one scan instead of split()
+# copies of the whole reply (the section stops at the next heading, as before)
+FINDINGS_SECTION_RE = re.compile(r"KEY FINDINGS:(.*?)(?=ANALYSIS:|KEY FINDINGS:|\Z)", re.DOTALL)
+CONFIDENCE_RE = re.compile(r"CONFIDENCE:\s*(\S+)")
+
 # Analysis Agent - Processes research findings (no tools needed)
 def analysis_agent_node(state: ResearchState) -> dict:
     """
@@ -347,21 +364,19 @@ CONFIDENCE: [0.0-1.0]"""
     
     # Extract key findings
     key_findings = []
-    if "KEY FINDINGS:" in content:
-        findings_section = content.split("KEY FINDINGS:")[1].split("ANALYSIS:")[0]
+    if match := FINDINGS_SECTION_RE.search(content):
         key_findings = [
             line.strip("- ").strip()
-            for line in findings_section.split("\n")
+            for line in match.group(1).split("\n")
             if line.strip().startswith("-")
         ]
     
     # Extract confidence score
     confidence_score = 0.7  # Default
-    if "CONFIDENCE:" in content:
+    if match := CONFIDENCE_RE.search(content):
         try:
-            conf_text = content.split("CONFIDENCE:")[1].strip().split()[0]
-            confidence_score = float(conf_text)
-        except:
+            confidence_score = float(match.group(1))
+        except ValueError:
             pass
     
     # Write to shared state
@@ -645,8 +660,6 @@ def main():
     print("MULTI-AGENT COLLABORATION WITH SHARED STATE DEMO")
     print("="*80 + "\n")
     
-    graph = create_research_graph()
-    
     # Example query
     query = "What are the latest developments in AI agents and LangGraph?"
     
@@ -6,7 +6,7 @@ import os
 from pathlib import Path
 from dotenv import load_dotenv
 from langchain_core.messages import HumanMessage
-from main import create_research_graph
+from main import graph
 
 # Load environment
 env_path = Path(__file__).parent / ".env"
@@ -18,8 +18,6 @@ def test_web_search():
     print("TESTING REAL WEB SEARCH")
     print("="*80 + "\n")
     
-    graph = create_research_graph()
-    
     query = "What is LangGraph?"
     print(f"Query: {query}\n")
     print("-" * 80)
@@ -17,10 +17,13 @@ Use Case: Multi-Day Project Management Workflow
 """
 
 import os
+import re
+import functools
+import threading
 from typing import Annotated, Literal
 from pathlib import Path
 from dotenv import load_dotenv
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
 from typing_extensions import TypedDict
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
@@ -28,7 +31,10 @@ from langchain_openai import ChatOpenAI
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
 from langgraph.checkpoint.sqlite import SqliteSaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.checkpoint.base.id import UUID as CheckpointUUID
 import sqlite3
+import zstandard
 
 # ============================================================================
 # Environment Setup
@@ -65,13 +71,39 @@ if LANGSMITH_API_KEY and LANGSMITH_TRACING:
 else:
     print("ℹ️  LangSmith tracing disabled")
 
-print("Using model: OpenAI GPT-4o-mini")
-model = ChatOpenAI(model="gpt-4o-mini", api_key=OPENAI_API_KEY)
+# Checkpoint compression (Optional - on by default, turn off when CPU is scarcer than disk)
+CHECKPOINT_COMPRESSION = os.getenv("CHECKPOINT_COMPRESSION", "true").lower() == "true"
+
+# Checkpoint retention (Optional - off by default; set to N to delete projects idle over N days on startup)
+CHECKPOINT_RETENTION_DAYS = int(os.getenv("CHECKPOINT_RETENTION_DAYS") or 0)  # Empty means off too
+
+@functools.lru_cache(maxsize=1)
+def get_model() -> ChatOpenAI:
+    """
+    Create the shared chat model on first use.
+    
+    Inspection paths (get_state, history, resume checks) never call the LLM,
+    so building the workflow doesn't pay for an OpenAI client up front.
+    """
+    print("Using model: OpenAI GPT-4o-mini")
+    return ChatOpenAI(model="gpt-4o-mini", api_key=OPENAI_API_KEY)
 
 # ============================================================================
 # State Schema with Persistence Fields
 # ============================================================================
 
+def extend_list(existing: list | None, new: list | None) -> list:
+    """
+    Reducer for append-only lists.
+    
+    Nodes return only their new entries, so each channel write carries the
+    delta instead of the whole list. Passing None starts the list over, which
+    start_new_project uses when a thread is reused for a fresh run.
+    """
+    if new is None:
+        return []
+    return (existing or []) + new
+
 class ProjectState(TypedDict):
     """
     State for a multi-day project workflow.
@@ -92,12 +124,12 @@ class ProjectState(TypedDict):
     
     # Stage outputs (persisted)
     project_plan: str  # Output from planning stage
-    execution_results: list[str]  # Output from execution stage
+    execution_results: Annotated[list[str], extend_list]  # Execution report previews (full text is in messages)
     final_report: str  # Output from review stage
     
     # Workflow tracking
     current_stage: Literal["planning", "execution", "review", "complete", "start"]
-    completed_tasks: list[str]
+    completed_tasks: Annotated[list[str], extend_list]
     pending_tasks: list[str]
     
     # Metadata
@@ -109,6 +141,13 @@ class ProjectState(TypedDict):
 # Stage Nodes
 # ============================================================================
 
+# Review only reads the start of each execution report; the full report already
+# lives in `messages`, so state keeps just this much of it
+REPORT_PREVIEW_CHARS = 200
+
+# Plan lines that mention a task, step, or phase (one regex scan per plan)
+TASK_LINE_RE = re.compile(r"^.*(?:task|step|phase).*$", re.IGNORECASE | re.MULTILINE)
+
 def planning_stage(state: ProjectState) -> dict:
     """
     Stage 1: Project Planning
@@ -143,22 +182,23 @@ Please create a detailed project plan with:
 Format as a structured plan."""
 
     messages = [SystemMessage(content=system_prompt), HumanMessage(content=prompt)]
-    response = model.invoke(messages)
+    response = get_model().invoke(messages)
     
     # Extract tasks from the plan (simple parsing for demo)
     plan_text = response.content
     tasks = []
-    for line in plan_text.split("\n"):
-        if any(marker in line.lower() for marker in ["task", "step", "phase"]):
-            task = line.strip("- *123456789. ")
-            if task and len(task) > 10:
-                tasks.append(task[:100])  # Limit length
+    for match in TASK_LINE_RE.finditer(plan_text):
+        task = match.group().strip("- *123456789. ")
+        if len(task) > 10:
+            tasks.append(task[:100])  # Limit length
+            if len(tasks) == 10:
+                break
     
     return {
         "messages": [response],
         "project_plan": plan_text,
         "planning_complete": True,
-        "pending_tasks": tasks[:10] if tasks else ["Task 1", "Task 2", "Task 3"],
+        "pending_tasks": tasks or ["Task 1", "Task 2", "Task 3"],
         "current_stage": "execution",
         "last_updated": datetime.now().isoformat(),
     }
@@ -196,23 +236,20 @@ Already Completed:
 Simulate executing the next 2-3 tasks and report progress."""
 
     messages = [SystemMessage(content=system_prompt), HumanMessage(content=prompt)]
-    response = model.invoke(messages)
+    response = get_model().invoke(messages)
     
     # Simulate task completion
     tasks_to_complete = min(3, len(pending))
     newly_completed = pending[:tasks_to_complete]
     remaining_pending = pending[tasks_to_complete:]
     
-    execution_results = state.get("execution_results", [])
-    execution_results.append(response.content)
-    
     # Check if all tasks are done
     all_done = len(remaining_pending) == 0
     
     return {
         "messages": [response],
-        "execution_results": execution_results,
-        "completed_tasks": completed + newly_completed,
+        "execution_results": [response.content[:REPORT_PREVIEW_CHARS]],  # Appended by extend_list
+        "completed_tasks": newly_completed,
         "pending_tasks": remaining_pending,
         "execution_complete": all_done,
         "current_stage": "review" if all_done else "execution",
@@ -248,7 +285,7 @@ Completed Tasks ({len(completed)}):
 {chr(10).join(f'✓ {task}' for task in completed)}
 
 Execution Reports:
-{chr(10).join(f'Report {i+1}: {result[:200]}...' for i, result in enumerate(results))}
+{chr(10).join(f'Report {i+1}: {result}...' for i, result in enumerate(results))}
 
 Create a final project report with:
 1. Executive summary
@@ -258,7 +295,7 @@ Create a final project report with:
 5. Recommendations"""
 
     messages = [SystemMessage(content=system_prompt), HumanMessage(content=prompt)]
-    response = model.invoke(messages)
+    response = get_model().invoke(messages)
     
     return {
         "messages": [response],
@@ -272,32 +309,138 @@ Create a final project report with:
 # Router
 # ============================================================================
 
+# Next node indexed by (review_done << 2) | (execution_done << 1) | planning_done
+ROUTES = (
+    "planning",   # nothing done
+    "execution",  # planned
+    "planning",   # executed but not planned (re-plan)
+    "review",     # planned and executed
+    "__end__", "__end__", "__end__", "__end__",  # reviewed
+)
+
 def route_workflow(state: ProjectState) -> Literal["planning", "execution", "review", "__end__"]:
     """
     Route based on current stage and completion status.
     
     This demonstrates state-aware routing with persistence.
     """
-    current_stage = state.get("current_stage", "start")
+    if state.get("current_stage") == "complete":
+        return "__end__"
+    
+    # Pack the completion flags into a table index
+    index = (
+        (bool(state.get("review_complete")) << 2)
+        | (bool(state.get("execution_complete")) << 1)
+        | bool(state.get("planning_complete"))
+    )
+    return ROUTES[index]
+
+# ============================================================================
+# Checkpoint Serialization
+# ============================================================================
+
+# Every zstd frame starts with these four bytes
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+class ZstdSerializer:
+    """
+    Checkpoint serializer that zstd-compresses large payloads.
     
-    # Check completion flags
-    planning_done = state.get("planning_complete", False)
-    execution_done = state.get("execution_complete", False)
-    review_done = state.get("review_complete", False)
+    Reads dispatch on the zstd frame magic, so checkpoints written before
+    compression was enabled (or while it was turned off) still load unchanged.
+    Compressed frames carry a content checksum, so a corrupted blob fails
+    loudly on load instead of decoding into bad state.
+    """
+
+    def __init__(self, serde=None, level: int = 3, min_size: int = 1024, compress: bool = True):
+        # msgpack-only: never fall back to pickle for unknown types
+        self.serde = serde or JsonPlusSerializer(pickle_fallback=False)
+        self.level = level
+        self.min_size = min_size  # Small channels aren't worth a zstd frame
+        self.compress = compress  # Off: write plain msgpack, still read zstd
+        self._local = threading.local()  # zstd contexts are not thread-safe
+
+    def _contexts(self) -> tuple[zstandard.ZstdCompressor, zstandard.ZstdDecompressor]:
+        """Get this thread's compressor/decompressor pair"""
+        if not hasattr(self._local, "contexts"):
+            self._local.contexts = (
+                # Frame checksum is XXH64 of the content, checked on decompress
+                zstandard.ZstdCompressor(level=self.level, write_checksum=True),
+                zstandard.ZstdDecompressor(),
+            )
+        return self._local.contexts
+
+    def dumps_typed(self, obj) -> tuple[str, bytes]:
+        type_, data = self.serde.dumps_typed(obj)
+        if self.compress and len(data) >= self.min_size:
+            data = self._contexts()[0].compress(data)
+        return type_, data
+
+    def loads_typed(self, data: tuple[str, bytes]):
+        type_, payload = data
+        if payload[:4] == ZSTD_MAGIC:
+            payload = self._contexts()[1].decompress(payload)
+        return self.serde.loads_typed((type_, payload))
+
+# ============================================================================
+# SQLite Tuning
+# ============================================================================
+
+def tune_sqlite(conn: sqlite3.Connection) -> sqlite3.Connection:
+    """
+    Apply WAL mode and I/O-friendly pragmas to a checkpoint connection.
     
-    if current_stage == "complete" or review_done:
-        return "__end__"
-    elif not planning_done:
-        return "planning"
-    elif not execution_done:
-        return "execution"
-    else:
-        return "review"
+    WAL lets readers run alongside the checkpoint writer, synchronous=NORMAL
+    drops commits to roughly one fsync, and memory-mapping the file lets
+    history/inspection scans read pages without a syscall each. Checkpointing
+    of the WAL file is left to SQLite's passive autocheckpoint.
+    """
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-20000")  # ~20MB page cache
+    conn.execute("PRAGMA mmap_size=268435456")  # Serve history reads from a 256MB mmap
+    conn.execute("PRAGMA wal_autocheckpoint=1000")
+    return conn
+
+# One connection per (thread, database)
+_thread_connections = threading.local()
+
+def get_connection(db_path: str) -> sqlite3.Connection:
+    """
+    Get this thread's tuned connection for a checkpoint database.
+    
+    Building the workflow again on the same thread (e.g. the module-level
+    graph plus main(), or repeated resume/history calls) reuses one connection
+    instead of reopening the file and cold-starting its page cache. Other
+    threads (a monitoring reader, a pool of resume workers) get their own
+    connection, so with WAL they read alongside the writer instead of queueing
+    behind one shared connection and its saver lock.
+    """
+    connections = getattr(_thread_connections, "by_path", None)
+    if connections is None:
+        connections = _thread_connections.by_path = {}
+    
+    conn = connections.get(db_path)
+    if conn is None:
+        # Still check_same_thread=False: LangGraph calls the saver from its
+        # own executor threads, not only the thread that built the graph
+        conn = tune_sqlite(sqlite3.connect(db_path, check_same_thread=False))
+        connections[db_path] = conn
+    return conn
 
 # ============================================================================
 # Create Workflow with Persistence
 # ============================================================================
 
+def build_checkpointer(db_path: str = "project_checkpoints.db") -> SqliteSaver:
+    """Create the SQLite checkpointer on the cached connection for db_path"""
+    return SqliteSaver(
+        get_connection(db_path),
+        serde=ZstdSerializer(compress=CHECKPOINT_COMPRESSION),
+    )
+
 def create_project_workflow(db_path: str = "project_checkpoints.db"):
     """
     Create a stateful workflow with SQLite persistence.
@@ -309,9 +452,7 @@ def create_project_workflow(db_path: str = "project_checkpoints.db"):
         Compiled graph with checkpointer
     """
     # Create checkpointer (persists to SQLite)
-    # Create connection and initialize checkpointer
-    conn = sqlite3.connect(db_path, check_same_thread=False)
-    checkpointer = SqliteSaver(conn)
+    checkpointer = build_checkpointer(db_path)
     
     # Build workflow
     workflow = StateGraph(ProjectState)
@@ -361,15 +502,45 @@ def create_project_workflow(db_path: str = "project_checkpoints.db"):
     # Compile with checkpointer
     return workflow.compile(checkpointer=checkpointer)
 
+# Compiled workflows per (thread, database), matching get_connection
+_thread_workflows = threading.local()
+
+def get_or_create_workflow(db_path: str = "project_checkpoints.db"):
+    """
+    Get the compiled workflow for a database, building it on first use.
+    
+    resume_project/get_project_history callers can call this repeatedly without
+    recompiling the graph or re-initializing its checkpointer each time.
+    """
+    workflows = getattr(_thread_workflows, "by_path", None)
+    if workflows is None:
+        workflows = _thread_workflows.by_path = {}
+    
+    workflow = workflows.get(db_path)
+    if workflow is None:
+        workflow = workflows[db_path] = create_project_workflow(db_path)
+    return workflow
+
 # Export for LangGraph server
-graph = create_project_workflow()
+graph = get_or_create_workflow()
 
 # ============================================================================
 # Helper Functions
 # ============================================================================
 
+def stream_stages(graph, graph_input, config: dict) -> None:
+    """Run the workflow, printing each stage transition as one write per event"""
+    for event in graph.stream(graph_input, config):
+        lines = []
+        for node, values in event.items():
+            lines.append(f"\n✓ {node.upper()} stage completed")
+            if "current_stage" in values:
+                lines.append(f"  Next: {values['current_stage']}")
+        print("\n".join(lines))
+
 def start_new_project(graph, project_name: str, project_description: str, thread_id: str = "project-1"):
     """Start a new project workflow"""
+    now = datetime.now().isoformat()
     initial_state = {
         "messages": [HumanMessage(content=f"Starting project: {project_name}")],
         "project_name": project_name,
@@ -378,13 +549,13 @@ def start_new_project(graph, project_name: str, project_description: str, thread
         "execution_complete": False,
         "review_complete": False,
         "project_plan": "",
-        "execution_results": [],
+        "execution_results": None,  # Reset any results from an earlier run
         "final_report": "",
         "current_stage": "planning",
-        "completed_tasks": [],
+        "completed_tasks": None,
         "pending_tasks": [],
-        "started_at": datetime.now().isoformat(),
-        "last_updated": datetime.now().isoformat(),
+        "started_at": now,
+        "last_updated": now,
         "session_count": 1,
     }
     
@@ -394,11 +565,7 @@ def start_new_project(graph, project_name: str, project_description: str, thread
     print(f"📝 Thread ID: {thread_id}")
     print("-" * 80)
     
-    for event in graph.stream(initial_state, config):
-        for node, values in event.items():
-            print(f"\n✓ {node.upper()} stage completed")
-            if "current_stage" in values:
-                print(f"  Next: {values['current_stage']}")
+    stream_stages(graph, initial_state, config)
     
     return config
 
@@ -413,40 +580,101 @@ def resume_project(graph, thread_id: str = "project-1"):
         print(f"❌ No project found with thread_id: {thread_id}")
         return None
     
-    print(f"\n🔄 Resuming project: {state.values.get('project_name', 'Unknown')}")
-    print(f"📍 Current stage: {state.values.get('current_stage', 'unknown')}")
-    print(f"📊 Progress:")
-    print(f"  - Planning: {'✅' if state.values.get('planning_complete') else '⏳'}")
-    print(f"  - Execution: {'✅' if state.values.get('execution_complete') else '⏳'}")
-    print(f"  - Review: {'✅' if state.values.get('review_complete') else '⏳'}")
-    print("-" * 80)
+    values = state.values
+    print(
+        f"\n🔄 Resuming project: {values.get('project_name', 'Unknown')}\n"
+        f"📍 Current stage: {values.get('current_stage', 'unknown')}\n"
+        f"📊 Progress:\n"
+        f"  - Planning: {'✅' if values.get('planning_complete') else '⏳'}\n"
+        f"  - Execution: {'✅' if values.get('execution_complete') else '⏳'}\n"
+        f"  - Review: {'✅' if values.get('review_complete') else '⏳'}\n"
+        + "-" * 80
+    )
     
     # Continue from where we left off
-    for event in graph.stream(None, config):
-        for node, values in event.items():
-            print(f"\n✓ {node.upper()} stage completed")
-            if "current_stage" in values:
-                print(f"  Next: {values['current_stage']}")
+    stream_stages(graph, None, config)
     
     return config
 
-def get_project_history(graph, thread_id: str = "project-1"):
-    """Get all checkpoints for a project (time-travel)"""
+def count_checkpoints(graph, thread_id: str = "project-1") -> int:
+    """Count a project's checkpoints in SQL without deserializing any of them"""
+    checkpointer = graph.checkpointer
+    # cursor() runs setup() and holds the saver's lock, so the query never
+    # interleaves with a put() on the shared connection
+    with checkpointer.cursor(transaction=False) as cur:
+        cur.execute(
+            "SELECT COUNT(*) FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ''",
+            (thread_id,),
+        )
+        return cur.fetchone()[0]
+
+def get_project_history(graph, thread_id: str = "project-1", limit: int | None = 50):
+    """
+    Print a project's checkpoints (time-travel), newest first.
+    
+    Args:
+        graph: Compiled workflow with a checkpointer
+        thread_id: Project thread to inspect
+        limit: Only load and print the newest N checkpoints (None for all).
+            SqliteSaver.list() still runs one writes query per checkpoint,
+            so the default also bounds the number of queries.
+        
+    Returns:
+        Number of checkpoints printed
+    """
     config = {"configurable": {"thread_id": thread_id}}
     
     print(f"\n📜 Project History (Thread: {thread_id})")
+    print(f"   Total checkpoints: {count_checkpoints(graph, thread_id)}")
     print("=" * 80)
     
-    checkpoints = list(graph.get_state_history(config))
-    
-    for i, checkpoint in enumerate(checkpoints):
-        print(f"\nCheckpoint {i + 1}:")
+    # Stream checkpoints instead of holding the whole history in memory
+    count = 0
+    # limit goes down to the SQL query, so older checkpoints are never deserialized
+    for count, checkpoint in enumerate(graph.get_state_history(config, limit=limit), 1):
+        print(f"\nCheckpoint {count}:")
         print(f"  Stage: {checkpoint.values.get('current_stage', 'unknown')}")
         print(f"  Completed tasks: {len(checkpoint.values.get('completed_tasks', []))}")
         print(f"  Pending tasks: {len(checkpoint.values.get('pending_tasks', []))}")
         print(f"  Last updated: {checkpoint.values.get('last_updated', 'N/A')}")
     
-    return checkpoints
+    return count
+
+# 100ns intervals between the UUID epoch (1582-10-15) and the Unix epoch
+UUID_EPOCH_OFFSET = 0x01b21dd213814000
+
+def checkpoint_time(checkpoint_id: str) -> datetime:
+    """Decode when a checkpoint was written from its time-ordered (UUIDv6) id"""
+    ticks = CheckpointUUID(checkpoint_id).time - UUID_EPOCH_OFFSET
+    return datetime.fromtimestamp(ticks / 10_000_000, tz=timezone.utc)
+
+def delete_stale_projects(graph, days: int = CHECKPOINT_RETENTION_DAYS) -> list[str]:
+    """
+    Delete every project thread whose newest checkpoint is older than `days`.
+    
+    Checkpoints otherwise accumulate forever, one thread per project. Staleness
+    comes from the newest checkpoint id per thread (a single grouped query),
+    so no checkpoint is deserialized; each stale thread is then removed with
+    the saver's own delete_thread().
+    
+    Returns:
+        Thread ids that were deleted
+    """
+    if days <= 0:
+        return []
+    
+    checkpointer = graph.checkpointer
+    checkpointer.setup()  # No-op once the tables exist
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    with checkpointer.cursor(transaction=False) as cur:
+        rows = cur.execute(
+            "SELECT thread_id, MAX(checkpoint_id) FROM checkpoints GROUP BY thread_id"
+        ).fetchall()
+    stale = [thread_id for thread_id, newest in rows if checkpoint_time(newest) < cutoff]
+    
+    for thread_id in stale:
+        checkpointer.delete_thread(thread_id)
+    return stale
 
 # ============================================================================
 # Example Usage
@@ -460,11 +688,15 @@ def main():
     
     # Create workflow with SQLite persistence
     db_path = "project_checkpoints.db"
-    graph = create_project_workflow(db_path)
+    graph = get_or_create_workflow(db_path)
     
     print(f"💾 Using SQLite database: {db_path}")
     print(f"   (State persists across sessions)\n")
     
+    deleted = delete_stale_projects(graph)
+    if deleted:
+        print(f"🧹 Removed {len(deleted)} project(s) idle for over {CHECKPOINT_RETENTION_DAYS} days\n")
+    
     # Example 1: Start a new project
     project_name = "AI Agent Platform"
     project_description = """
@@ -484,11 +716,11 @@ def main():
     
     # Show how to resume
     print("\n💡 To resume this project later:")
-    print("   python -c \"from main import resume_project, create_project_workflow; resume_project(create_project_workflow(), 'project-1')\"")
+    print("   python -c \"from main import resume_project, get_or_create_workflow; resume_project(get_or_create_workflow(), 'project-1')\"")
     
     # Show how to view history
     print("\n💡 To view project history:")
-    print("   python -c \"from main import get_project_history, create_project_workflow; get_project_history(create_project_workflow(), 'project-1')\"")
+    print("   python -c \"from main import get_project_history, get_or_create_workflow; get_project_history(get_or_create_workflow(), 'project-1')\"")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,18 @@
+"""
+Single read of the demo's .env file.
+
+Import ENV instead of calling dotenv_values()/load_dotenv() again: the file
+is parsed once per interpreter, and its values are copied into os.environ
+without overriding the machine environment (same as load_dotenv(override=False)),
+so LangSmith tracing and the API-key checks still see them.
+"""
+
+import os
+
+from dotenv import dotenv_values
+
+ENV = dotenv_values()
+
+for _key, _value in ENV.items():
+    if _value is not None:
+        os.environ.setdefault(_key, _value)
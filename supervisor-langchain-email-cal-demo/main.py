@@ -6,28 +6,21 @@ A supervisor agent coordinates specialized sub-agents (calendar and email)
 that are wrapped as tools.
 """
 
+import contextlib
+import io
 import os
-from dotenv import load_dotenv, dotenv_values
+import sys
 from langchain_core.tools import tool
 from langchain.agents import create_agent
-from langchain_openai import ChatOpenAI
 
-# Load environment variables (do not override .env into process env)
-load_dotenv(override=False)
+# Importing model also loads .env once (see _env.py)
+from model import get_model
 
 # ============================================================================
 # Model Configuration
 # ============================================================================
-# Using OpenAI GPT-4o-mini directly
-# Always read the API key directly from .env (not from machine env)
-_config = dotenv_values()
-OPENAI_API_KEY = _config.get("OPENAI_API_KEY")
-
-if not OPENAI_API_KEY:
-    raise ValueError("OPENAI_API_KEY not found in .env. Please add it to your .env file.")
-
-print("Using model: OpenAI GPT-4o-mini")
-model = ChatOpenAI(model="gpt-4o-mini", api_key=OPENAI_API_KEY)
+# One cached client shared by every agent in this demo (see model.py)
+model = get_model()
 
 # ============================================================================
 # Step 1: Define low-level API tools (stubbed)
@@ -58,15 +51,19 @@ def send_email(
     return f"📧 Email sent to {', '.join(to)} - Subject: {subject}"
 
 
+# Stubbed availability is the same for every call, so build it once
+AVAILABLE_TIME_SLOTS = ("09:00", "14:00", "16:00")
+
+
 @tool
 def get_available_time_slots(
     attendees: list[str],
     date: str,  # ISO format: "2024-01-15"
     duration_minutes: int
-) -> list[str]:
+) -> tuple[str, ...]:
     """Check calendar availability for given attendees on a specific date."""
     # Stub: In practice, this would query calendar APIs
-    return ["09:00", "14:00", "16:00"]
+    return AVAILABLE_TIME_SLOTS
 
 
 # ============================================================================
@@ -109,6 +106,9 @@ email_agent = create_agent(
 # Step 3: Wrap sub-agents as tools for the supervisor
 # ============================================================================
 
+# The sync tool node already runs the tool calls from one supervisor turn in
+# parallel, so both sub-agents overlap when the supervisor emits
+# schedule_event and manage_email in the same tool-call block.
 @tool
 def schedule_event(request: str) -> str:
     """Schedule calendar events using natural language.
@@ -150,7 +150,8 @@ SUPERVISOR_PROMPT = (
     "You are a helpful personal assistant. "
     "You can schedule calendar events and send emails. "
     "Break down user requests into appropriate tool calls and coordinate the results. "
-    "When a request involves multiple actions, use multiple tools in sequence."
+    "When a request involves multiple actions, use multiple tools. "
+    "When actions are independent, return them in one tool-call block."
 )
 
 supervisor_agent = create_agent(
@@ -164,6 +165,16 @@ supervisor_agent = create_agent(
 # Step 5: Use the supervisor
 # ============================================================================
 
+def print_step(step: dict) -> None:
+    """Pretty-print every message in one stream step with a single write."""
+    buf = io.StringIO()
+    with contextlib.redirect_stdout(buf):
+        for update in step.values():
+            for message in update.get("messages", []):
+                message.pretty_print()
+    sys.stdout.write(buf.getvalue())
+
+
 def run_example_1():
     """Example 1: Simple single-domain request"""
     print("\n" + "="*80)
@@ -176,9 +187,7 @@ def run_example_1():
     for step in supervisor_agent.stream(
         {"messages": [{"role": "user", "content": query}]}
     ):
-        for update in step.values():
-            for message in update.get("messages", []):
-                message.pretty_print()
+        print_step(step)
 
 
 def run_example_2():
@@ -196,9 +205,7 @@ def run_example_2():
     for step in supervisor_agent.stream(
         {"messages": [{"role": "user", "content": query}]}
     ):
-        for update in step.values():
-            for message in update.get("messages", []):
-                message.pretty_print()
+        print_step(step)
 
 
 def run_interactive():
@@ -221,9 +228,7 @@ def run_interactive():
         for step in supervisor_agent.stream(
             {"messages": [{"role": "user", "content": user_input}]}
         ):
-            for update in step.values():
-                for message in update.get("messages", []):
-                    message.pretty_print()
+            print_step(step)
         print()
 
 
@@ -6,30 +6,21 @@ allowing users to approve, edit, or reject actions before they execute.
 """
 
 import os
-from dotenv import load_dotenv, dotenv_values
+from collections import OrderedDict
 from langchain_core.tools import tool
 from langchain.agents import create_agent
 from langchain.agents.middleware import HumanInTheLoopMiddleware
-from langchain_openai import ChatOpenAI
 from langgraph.checkpoint.memory import InMemorySaver
 from langgraph.types import Command
 
-# Load environment variables (do not override .env into process env)
-load_dotenv(override=False)
+# Importing model also loads .env once (see _env.py)
+from model import get_model
 
 # ============================================================================
 # Model Configuration
 # ============================================================================
-# Using OpenAI GPT-4o-mini directly
-# Always read the API key directly from .env (not from machine env)
-_config = dotenv_values()
-OPENAI_API_KEY = _config.get("OPENAI_API_KEY")
-
-if not OPENAI_API_KEY:
-    raise ValueError("OPENAI_API_KEY not found in .env. Please add it to your .env file.")
-
-print("Using model: OpenAI GPT-4o-mini")
-model = ChatOpenAI(model="gpt-4o-mini", api_key=OPENAI_API_KEY)
+# One cached client shared by every agent in this demo (see model.py)
+model = get_model()
 
 # ============================================================================
 # Step 1: Define low-level API tools (stubbed)
@@ -58,14 +49,18 @@ def send_email(
     return f"📧 Email sent to {', '.join(to)} - Subject: {subject}"
 
 
+# Stubbed availability is the same for every call, so build it once
+AVAILABLE_TIME_SLOTS = ("09:00", "14:00", "16:00")
+
+
 @tool
 def get_available_time_slots(
     attendees: list[str],
     date: str,  # ISO format: "2024-01-15"
     duration_minutes: int
-) -> list[str]:
+) -> tuple[str, ...]:
     """Check calendar availability for given attendees on a specific date."""
-    return ["09:00", "14:00", "16:00"]
+    return AVAILABLE_TIME_SLOTS
 
 
 # ============================================================================
@@ -166,12 +161,69 @@ SUPERVISOR_PROMPT = (
     "When a request involves multiple actions, use multiple tools in sequence."
 )
 
+# ============================================================================
+# Bounded checkpointer
+# ============================================================================
+
+# Checkpoints kept per conversation thread (the newest is never evicted)
+MAX_CHECKPOINTS = 32
+
+
+class BoundedInMemorySaver(InMemorySaver):
+    """
+    InMemorySaver that keeps only the newest MAX_CHECKPOINTS checkpoints per thread.
+    
+    Every approve/edit cycle adds checkpoints carrying the full message
+    history, so an unbounded saver grows for as long as the interactive
+    session runs. Evicting each thread's oldest ones (and any channel blobs
+    no surviving checkpoint references) caps memory. The cap is per thread,
+    so activity on one thread can never evict another thread's latest
+    checkpoint, which is what resuming its interrupt needs.
+    """
+    
+    def __init__(self, *args, max_checkpoints: int = MAX_CHECKPOINTS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_checkpoints = max(1, max_checkpoints)
+        # (thread_id, checkpoint_ns) -> {checkpoint_id: channel_versions}, oldest first
+        self._order: dict[tuple[str, str], OrderedDict[str, dict]] = {}
+    
+    def put(self, config, checkpoint, metadata, new_versions):
+        next_config = super().put(config, checkpoint, metadata, new_versions)
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        checkpoints = self._order.setdefault((thread_id, checkpoint_ns), OrderedDict())
+        checkpoints[checkpoint["id"]] = dict(checkpoint["channel_versions"])
+        while len(checkpoints) > self.max_checkpoints:
+            checkpoint_id, _ = checkpoints.popitem(last=False)
+            self._evict(thread_id, checkpoint_ns, checkpoint_id)
+        return next_config
+    
+    def _evict(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> None:
+        self.storage[thread_id][checkpoint_ns].pop(checkpoint_id, None)
+        self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+        live = {
+            (channel, version)
+            for versions in self._order[(thread_id, checkpoint_ns)].values()
+            for channel, version in versions.items()
+        }
+        for key in [
+            k for k in self.blobs
+            if k[0] == thread_id and k[1] == checkpoint_ns and (k[2], k[3]) not in live
+        ]:
+            del self.blobs[key]
+    
+    def delete_thread(self, thread_id: str) -> None:
+        super().delete_thread(thread_id)
+        for key in [k for k in self._order if k[0] == thread_id]:
+            del self._order[key]
+
+
 # Add checkpointer to enable pause/resume for HITL
 supervisor_agent = create_agent(
     model,
     tools=[schedule_event, manage_email],
     system_prompt=SUPERVISOR_PROMPT,
-    checkpointer=InMemorySaver(),
+    checkpointer=BoundedInMemorySaver(),
 )
 
 
@@ -0,0 +1,40 @@
+"""
+Shared model factory for the supervisor demos.
+
+Both main.py and main_with_hitl.py build their agents from get_model(), so
+importing both in one interpreter (a notebook, python -c) creates a single
+ChatOpenAI client and a single keepalive pool to api.openai.com.
+"""
+
+import functools
+
+import httpx
+from langchain_openai import ChatOpenAI
+
+from _env import ENV
+
+# ============================================================================
+# Model Configuration
+# ============================================================================
+# Using OpenAI GPT-4o-mini directly
+# Always read the API key directly from .env (not from machine env)
+OPENAI_API_KEY = ENV.get("OPENAI_API_KEY")
+
+if not OPENAI_API_KEY:
+    raise ValueError("OPENAI_API_KEY not found in .env. Please add it to your .env file.")
+
+
+@functools.lru_cache(maxsize=1)
+def get_model() -> ChatOpenAI:
+    """
+    Return the shared ChatOpenAI client, creating it on first use.
+    
+    The supervisor fires calendar and email tool calls back to back, so the
+    sub-agents share one httpx keepalive pool instead of paying a TLS
+    handshake per request.
+    """
+    print("Using model: OpenAI GPT-4o-mini")
+    http_client = httpx.Client(
+        limits=httpx.Limits(max_keepalive_connections=20, keepalive_expiry=30)
+    )
+    return ChatOpenAI(model="gpt-4o-mini", api_key=OPENAI_API_KEY, http_client=http_client)
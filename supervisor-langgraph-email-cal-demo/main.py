@@ -8,26 +8,37 @@ Unlike LangChain-only implementations, this uses LangGraph's graph-based
 orchestration with explicit state management, nodes, and edges.
 """
 
+import asyncio
+import functools
+import hashlib
 import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
 from typing import Annotated, Literal
-from dotenv import load_dotenv, dotenv_values
+import httpx
+from dotenv import dotenv_values
 from langchain_core.tools import tool
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
-from langchain_openai import ChatOpenAI
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import MessagesState
-from langgraph.prebuilt import create_react_agent
+from langgraph.types import Send
 from typing_extensions import TypedDict
 
-# Load environment variables
-load_dotenv(override=False)
+# Load environment variables: parse .env once and copy it into the process
+# env without overriding it (what load_dotenv(override=False) did)
+_config = dotenv_values()
+for _key, _value in _config.items():
+    if _value is not None:
+        os.environ.setdefault(_key, _value)
 
 # ============================================================================
 # LangSmith Tracing Configuration (Optional)
 # ============================================================================
 
-_config = dotenv_values()
-
 # Enable LangSmith tracing if API key is provided
 LANGSMITH_API_KEY = _config.get("LANGSMITH_API_KEY")
 LANGSMITH_TRACING = _config.get("LANGSMITH_TRACING", "false").lower() == "true"
@@ -50,8 +61,95 @@ OPENAI_API_KEY = _config.get("OPENAI_API_KEY")
 if not OPENAI_API_KEY:
     raise ValueError("OPENAI_API_KEY not found in .env. Please add it to your .env file.")
 
-print("Using model: OpenAI GPT-4o-mini")
-model = ChatOpenAI(model="gpt-4o-mini", api_key=OPENAI_API_KEY)
+# One connection pool for every model and agent in the graph, so the fan-out
+# calls reuse warm keepalive connections to api.openai.com instead of each
+# ChatOpenAI opening its own
+HTTP_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16)
+HTTP_TIMEOUT = httpx.Timeout(60.0)
+
+
+class PerLoopAsyncTransport(httpx.AsyncBaseTransport):
+    """
+    Async transport with a separate connection pool for each event loop.
+    
+    Pooled async connections belong to the loop that opened them, so a single
+    module-level pool breaks the next asyncio.run() in the same process
+    (notebooks, eval scripts calling run_batch twice). Each loop gets its own
+    pool; pools of loops that have since closed are dropped when a new one
+    is created.
+    """
+    
+    def __init__(self, **transport_kwargs):
+        self._transport_kwargs = transport_kwargs
+        self._pools: dict[asyncio.AbstractEventLoop, httpx.AsyncHTTPTransport] = {}
+    
+    def _pool(self) -> httpx.AsyncHTTPTransport:
+        loop = asyncio.get_running_loop()
+        pool = self._pools.get(loop)
+        if pool is None:
+            # Pooled connections hold their loop, so closed loops are pruned
+            # here rather than left to garbage collection
+            self._pools = {
+                other: other_pool for other, other_pool in self._pools.items() if not other.is_closed()
+            }
+            pool = self._pools[loop] = httpx.AsyncHTTPTransport(**self._transport_kwargs)
+        return pool
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self._pool().handle_async_request(request)
+    
+    async def aclose(self) -> None:
+        pool = self._pools.pop(asyncio.get_running_loop(), None)
+        if pool is not None:
+            await pool.aclose()
+
+
+shared_http_client = httpx.Client(limits=HTTP_LIMITS, timeout=HTTP_TIMEOUT)
+shared_async_http_client = httpx.AsyncClient(
+    transport=PerLoopAsyncTransport(limits=HTTP_LIMITS), timeout=HTTP_TIMEOUT
+)
+
+# Models, agents and the graph are built on first use, not at import time:
+# importing langchain_openai alone is over half of this module's import cost,
+# which CLI startup and server cold starts would otherwise pay up front
+@functools.lru_cache(maxsize=1)
+def get_model():
+    """Create the shared gpt-4o-mini chat model on first use"""
+    from langchain_openai import ChatOpenAI
+    
+    print("Using model: OpenAI GPT-4o-mini")
+    return ChatOpenAI(
+        model="gpt-4o-mini",
+        api_key=OPENAI_API_KEY,
+        http_client=shared_http_client,
+        http_async_client=shared_async_http_client,
+    )
+
+# The supervisor only answers with a short JSON list of agents, so cap its
+# output and stop generating at the closing bracket instead of decoding a
+# full reply (room for ["calendar", "email"] and nothing more)
+ROUTER_MAX_TOKENS = 16
+
+# Routing is cascaded: a much smaller model answers first, and the decision
+# only escalates to gpt-4o-mini when the small model wasn't confident
+ROUTER_MODEL = "gpt-4.1-nano"
+ROUTER_MIN_LOGPROB = -0.7
+
+@functools.lru_cache(maxsize=1)
+def get_router_llms():
+    """Create the (router, fallback router) pair on first use"""
+    from langchain_openai import ChatOpenAI
+    
+    print(f"Using router model: OpenAI {ROUTER_MODEL} (escalates to GPT-4o-mini)")
+    router_llm = ChatOpenAI(
+        model=ROUTER_MODEL,
+        api_key=OPENAI_API_KEY,
+        logprobs=True,
+        http_client=shared_http_client,
+        http_async_client=shared_async_http_client,
+    ).bind(max_tokens=ROUTER_MAX_TOKENS, stop=["]"])
+    fallback_router_llm = get_model().bind(max_tokens=ROUTER_MAX_TOKENS, stop=["]"])
+    return router_llm, fallback_router_llm
 
 # ============================================================================
 # Define Low-Level Tools (stubbed for demo)
@@ -82,127 +180,442 @@ def send_email(
     return f"📧 Email sent to {', '.join(to)} - Subject: {subject}"
 
 
+@tool
+def schedule_and_notify(
+    title: str,
+    start_time: str,  # ISO format: "2024-01-15T14:00:00"
+    end_time: str,    # ISO format: "2024-01-15T15:00:00"
+    attendees: list[str],  # email addresses
+    subject: str,
+    body: str,
+    location: str = ""
+) -> str:
+    """Create a calendar event and email its attendees about it in one step."""
+    event = create_calendar_event.invoke({
+        "title": title,
+        "start_time": start_time,
+        "end_time": end_time,
+        "attendees": attendees,
+        "location": location,
+    })
+    email = send_email.invoke({"to": attendees, "subject": subject, "body": body})
+    return f"{event}\n{email}"
+
+
+# Stubbed availability is the same for every call, so build it once
+AVAILABLE_TIME_SLOTS = ("09:00", "14:00", "16:00")
+
+
 @tool
 def get_available_time_slots(
     attendees: list[str],
     date: str,  # ISO format: "2024-01-15"
     duration_minutes: int
-) -> list[str]:
+) -> tuple[str, ...]:
     """Check calendar availability for given attendees on a specific date."""
     # Stub: In practice, this would query calendar APIs
-    return ["09:00", "14:00", "16:00"]
+    return AVAILABLE_TIME_SLOTS
 
 
 # ============================================================================
 # Define State with Routing Decision
 # ============================================================================
 
+def merge_completed(existing: set[str] | None, new: set[str] | None) -> set[str]:
+    """Union of finished agents (parallel workers both report); None resets it"""
+    if new is None:
+        return set()
+    return (existing or set()) | new
+
+
 class SupervisorState(MessagesState):
     """Extended state that includes routing decisions"""
-    next_agent: Literal["calendar", "email", "FINISH", "__start__"]
+    # Agents to run next; independent agents run in parallel, empty means FINISH
+    next_agents: list[Literal["calendar", "email", "combined"]]
+    # Agents that have finished work for the current user request
+    completed: Annotated[set[str], merge_completed]
 
 
 # ============================================================================
-# Supervisor Node - Makes Routing Decisions
+# Fast Routing (keyword router in front of the LLM supervisor)
 # ============================================================================
 
-def supervisor_node(state: SupervisorState) -> dict:
+CALENDAR_RE = re.compile(r"\b(schedule|meeting|calendar|appointment|availability)\b", re.IGNORECASE)
+EMAIL_RE = re.compile(r"\b(email|e-mail|mail|send|message)\b", re.IGNORECASE)
+
+
+def requested_agents(text: str) -> set[str]:
+    """Agents whose keywords appear in a user request"""
+    agents = set()
+    if CALENDAR_RE.search(text):
+        agents.add("calendar")
+    if EMAIL_RE.search(text):
+        agents.add("email")
+    return agents
+
+
+def fast_route(state: SupervisorState) -> list[str] | None:
     """
-    Supervisor analyzes the conversation and decides which agent to route to next.
-    Uses the LLM to make intelligent routing decisions.
+    Route without the LLM when the answer is obvious.
+    
+    Returns the agents to run ([] for FINISH), or None to ask the supervisor
+    LLM. A fresh request goes straight to its agent when exactly one domain
+    matches, and to the combined agent when both do; after the workers
+    report, FINISH once every requested domain has completed. Unmatched
+    requests fall back to the LLM.
     """
-    # System prompt for the supervisor
-    system_prompt = """You are a supervisor managing calendar and email agents.
+    messages = state["messages"]
+    last = messages[-1]
+    if isinstance(last, HumanMessage):
+        agents = requested_agents(last.content) if isinstance(last.content, str) else set()
+        if len(agents) == 2:
+            return ["combined"]
+        return sorted(agents) if agents else None
+    
+    user = next((m for m in reversed(messages) if isinstance(m, HumanMessage)), None)
+    if user is None or not isinstance(user.content, str):
+        return None
+    requested = requested_agents(user.content)
+    if requested and requested <= state.get("completed", set()):
+        return []
+    return None
+
+
+# ============================================================================
+# Supervisor Node - Makes Routing Decisions
+# ============================================================================
+
+# Built once and always sent first, unchanged: OpenAI caches identical prompt
+# prefixes, so per-request details belong in later messages, never in here
+SUPERVISOR_PROMPT = """You are a supervisor managing calendar and email agents.
 
 Your job is to analyze the user's request and decide which agent should handle it next.
 
 Available agents:
 - calendar: Handles scheduling, availability checks, and calendar events
 - email: Handles email composition and sending
+- combined: Schedules a meeting and emails its attendees about it in one step
+
+Respond with ONLY a JSON list of the agents to run next:
+- ["calendar"] - if the task involves scheduling, meetings, or calendar operations
+- ["email"] - if the task involves sending emails or composing messages
+- ["combined"] - if a meeting must be scheduled and its attendees emailed about it
+- ["calendar", "email"] - if both are still needed and the email doesn't depend on the calendar result
+- ["FINISH"] - if all tasks are complete and you can provide a final response to the user
+
+Look at the conversation history. If an agent has already completed their task, don't list it again.
+Agents in the same list run at the same time, so only list an agent once its inputs are available."""
+
+_SUPERVISOR_SYS_MSG = SystemMessage(content=SUPERVISOR_PROMPT)
+
+# Routing words in a supervisor reply; whole words only, so e.g. "emails"
+# in an explanation doesn't count as picking the email agent
+ROUTE_WORD_RE = re.compile(r"\b(calendar|email|combined|finish)\b", re.IGNORECASE)
+
+
+# ============================================================================
+# Routing Cache
+# ============================================================================
+
+ROUTE_CACHE_SIZE = 4096
+
+# Optional: keep routing decisions on disk across runs (e.g. ~/.langgraph_cache/routes.db).
+# SQLite in WAL mode, so several server processes can share the file.
+ROUTE_CACHE_PATH = _config.get("ROUTE_CACHE_PATH")
+
+_route_cache: OrderedDict[str, tuple[str, ...]] = OrderedDict()
+_route_cache_lock = threading.Lock()
+
+# On-disk layer: one connection, opened on first use, guarded by its own lock
+# so in-memory lookups never wait on disk I/O
+_route_db: sqlite3.Connection | None = None
+_route_db_lock = threading.Lock()
+
+
+def route_cache_key(messages: list) -> str:
+    """Digest of the conversation (and the prompt, so edits invalidate old entries)"""
+    key = (SUPERVISOR_PROMPT,) + tuple((m.type, str(m.content)) for m in messages)
+    return hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+
+
+def _route_db_connection() -> sqlite3.Connection:
+    global _route_db
+    if _route_db is None:
+        path = Path(ROUTE_CACHE_PATH).expanduser()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.execute("CREATE TABLE IF NOT EXISTS routes (key TEXT PRIMARY KEY, agents TEXT NOT NULL)")
+        _route_db = conn
+    return _route_db
+
+
+def _load_route(key: str) -> tuple[str, ...] | None:
+    """Read a decision from the on-disk cache (blocking)"""
+    with _route_db_lock:
+        row = _route_db_connection().execute(
+            "SELECT agents FROM routes WHERE key = ?", (key,)
+        ).fetchone()
+    if row is None:
+        return None
+    return tuple(row[0].split(",")) if row[0] else ()
+
+
+def _store_route(key: str, next_agents: tuple[str, ...]) -> None:
+    """Write a decision to the on-disk cache (blocking)"""
+    with _route_db_lock:
+        _route_db_connection().execute(
+            "INSERT OR REPLACE INTO routes (key, agents) VALUES (?, ?)",
+            (key, ",".join(next_agents)),
+        )
+
+
+def _remember_route(key: str, next_agents: tuple[str, ...]) -> None:
+    with _route_cache_lock:
+        _route_cache[key] = next_agents
+        _route_cache.move_to_end(key)
+        if len(_route_cache) > ROUTE_CACHE_SIZE:
+            _route_cache.popitem(last=False)
 
-Respond with ONLY ONE of these options:
-- "calendar" - if the task involves scheduling, meetings, or calendar operations
-- "email" - if the task involves sending emails or composing messages  
-- "FINISH" - if all tasks are complete and you can provide a final response to the user
 
-Look at the conversation history. If an agent has already completed their task, decide what to do next.
-If both calendar and email tasks are needed, handle them one at a time."""
+def _recall_route(key: str) -> tuple[str, ...] | None:
+    with _route_cache_lock:
+        next_agents = _route_cache.get(key)
+        if next_agents is not None:
+            _route_cache.move_to_end(key)
+        return next_agents
 
-    messages = [SystemMessage(content=system_prompt)] + state["messages"]
+
+def get_cached_route(key: str) -> list[str] | None:
+    """Look up a routing decision in memory, then on disk if configured"""
+    next_agents = _recall_route(key)
+    if next_agents is None and ROUTE_CACHE_PATH:
+        next_agents = _load_route(key)
+        if next_agents is not None:
+            _remember_route(key, next_agents)
+    return None if next_agents is None else list(next_agents)
+
+
+async def aget_cached_route(key: str) -> list[str] | None:
+    """Async version of get_cached_route; disk reads run off the event loop"""
+    next_agents = _recall_route(key)
+    if next_agents is None and ROUTE_CACHE_PATH:
+        next_agents = await asyncio.to_thread(_load_route, key)
+        if next_agents is not None:
+            _remember_route(key, next_agents)
+    return None if next_agents is None else list(next_agents)
+
+
+def cache_route(key: str, next_agents: list[str]) -> None:
+    """Store only the decision, not the supervisor's full response"""
+    _remember_route(key, tuple(next_agents))
+    if ROUTE_CACHE_PATH:
+        _store_route(key, tuple(next_agents))
+
+
+async def acache_route(key: str, next_agents: list[str]) -> None:
+    """Async version of cache_route; disk writes run off the event loop"""
+    _remember_route(key, tuple(next_agents))
+    if ROUTE_CACHE_PATH:
+        await asyncio.to_thread(_store_route, key, tuple(next_agents))
+
+
+# Worker replies after the user's request that the router still sees
+ROUTER_CONTEXT_REPLIES = 4
+
+
+def routing_context(messages: list) -> list:
+    """
+    The slice of history the router needs: the latest user request and the
+    plain-text replies after it.
     
-    response = model.invoke(messages)
+    Tool calls and tool results are left out; they make up most of a worker's
+    messages, the router only needs each worker's confirmation, and a tool
+    result sent without its tool call would be rejected by the API anyway.
+    """
+    start = next(
+        (i for i in range(len(messages) - 1, -1, -1) if isinstance(messages[i], HumanMessage)),
+        0,
+    )
+    replies = [
+        m for m in messages[start + 1:]
+        if isinstance(m, AIMessage) and not m.tool_calls and m.content
+    ]
+    return [messages[start], *replies[-ROUTER_CONTEXT_REPLIES:]]
+
+
+def router_confidence(response: AIMessage) -> float:
+    """Lowest token logprob in a routing reply (-inf when none were returned)"""
+    tokens = (response.response_metadata.get("logprobs") or {}).get("content") or []
+    return min((token["logprob"] for token in tokens), default=float("-inf"))
+
+
+def invoke_router(messages: list) -> AIMessage:
+    """Ask the small router model; escalate to the main model on low confidence"""
+    router_llm, fallback_router_llm = get_router_llms()
+    response = router_llm.invoke(messages)
+    if router_confidence(response) >= ROUTER_MIN_LOGPROB:
+        return response
+    return fallback_router_llm.invoke(messages)
+
+
+async def ainvoke_router(messages: list) -> AIMessage:
+    """Async version of invoke_router"""
+    router_llm, fallback_router_llm = get_router_llms()
+    response = await router_llm.ainvoke(messages)
+    if router_confidence(response) >= ROUTER_MIN_LOGPROB:
+        return response
+    return await fallback_router_llm.ainvoke(messages)
+
+
+def parse_route_reply(response: AIMessage) -> list[str]:
+    """Extract the routing decision from a supervisor reply (one regex pass)"""
+    picked = {word.lower() for word in ROUTE_WORD_RE.findall(response.content)}
+    if "combined" in picked:
+        return ["combined"]
+    return [agent for agent in ("calendar", "email") if agent in picked]
+
+
+# Every node has a sync and an async body, so graph.invoke()/stream() and
+# graph.ainvoke()/astream() both work
+def supervisor_node(state: SupervisorState) -> dict:
+    """
+    Supervisor analyzes the conversation and decides which agent to route to next.
+    Uses the keyword router when it can, and the LLM for everything else.
+    """
+    # A new user request starts with no agents completed
+    completed = None if isinstance(state["messages"][-1], HumanMessage) else set()
     
-    # Extract the routing decision from the response
-    content = response.content.strip().lower()
+    next_agents = fast_route(state)
+    if next_agents is not None:
+        return {"next_agents": next_agents, "completed": completed}
     
-    if "calendar" in content:
-        next_agent = "calendar"
-    elif "email" in content:
-        next_agent = "email"
-    else:
-        next_agent = "FINISH"
+    context = routing_context(state["messages"])
+    
+    # Same conversation as an earlier run: reuse its decision, skip the LLM
+    cache_key = route_cache_key(context)
+    next_agents = get_cached_route(cache_key)
+    if next_agents is not None:
+        return {"next_agents": next_agents, "completed": completed}
+    
+    response = invoke_router([_SUPERVISOR_SYS_MSG, *context])
+    next_agents = parse_route_reply(response)
+    cache_route(cache_key, next_agents)
+    
+    return {"messages": [response], "next_agents": next_agents, "completed": completed}
+
+
+async def asupervisor_node(state: SupervisorState) -> dict:
+    """Async version of supervisor_node"""
+    completed = None if isinstance(state["messages"][-1], HumanMessage) else set()
+    
+    next_agents = fast_route(state)
+    if next_agents is not None:
+        return {"next_agents": next_agents, "completed": completed}
+    
+    context = routing_context(state["messages"])
+    cache_key = route_cache_key(context)
+    next_agents = await aget_cached_route(cache_key)
+    if next_agents is not None:
+        return {"next_agents": next_agents, "completed": completed}
+    
+    response = await ainvoke_router([_SUPERVISOR_SYS_MSG, *context])
+    next_agents = parse_route_reply(response)
+    await acache_route(cache_key, next_agents)
     
-    return {
-        "messages": [response],
-        "next_agent": next_agent
-    }
+    return {"messages": [response], "next_agents": next_agents, "completed": completed}
 
 
 # ============================================================================
 # Worker Agent Nodes
 # ============================================================================
 
-# Create calendar agent using prebuilt create_react_agent
-calendar_agent = create_react_agent(
-    model,
-    tools=[create_calendar_event, get_available_time_slots],
-    prompt="""You are a calendar scheduling assistant.
+CALENDAR_AGENT_PROMPT = """You are a calendar scheduling assistant.
     
 Parse natural language scheduling requests into proper ISO datetime formats.
 Use the available tools to check availability and create calendar events.
-Always confirm what was scheduled in your response.""",
-)
-
-def calendar_agent_node(state: SupervisorState) -> dict:
-    """Calendar agent handles scheduling tasks"""
-    # Invoke the prebuilt agent - it handles all tool calling logic
-    result = calendar_agent.invoke(state)
-    return {"messages": result["messages"]}
-
+Always confirm what was scheduled in your response."""
 
-# Create email agent using prebuilt create_react_agent
-email_agent = create_react_agent(
-    model,
-    tools=[send_email],
-    prompt="""You are an email assistant.
+EMAIL_AGENT_PROMPT = """You are an email assistant.
     
 Compose professional emails based on natural language requests.
 Extract recipient information and craft appropriate subject lines and body text.
 Use the send_email tool to send messages.
-Always confirm what was sent in your response.""",
-)
+Always confirm what was sent in your response."""
+
+# The combined agent serves compound "schedule it and tell them" requests:
+# one agent loop instead of a calendar loop and an email loop
+COMBINED_AGENT_PROMPT = """You are a scheduling and email assistant.
+    
+Parse natural language scheduling requests into proper ISO datetime formats.
+When a meeting must be scheduled and its attendees emailed about it, use the
+schedule_and_notify tool to do both in one call. Use the other tools for anything else.
+Always confirm what was scheduled and sent in your response."""
+
+AGENT_SPECS = {
+    "calendar": ([create_calendar_event, get_available_time_slots], CALENDAR_AGENT_PROMPT),
+    "email": ([send_email], EMAIL_AGENT_PROMPT),
+    "combined": (
+        [schedule_and_notify, create_calendar_event, send_email, get_available_time_slots],
+        COMBINED_AGENT_PROMPT,
+    ),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def get_agent(agent_name: str):
+    """Create a worker agent with the prebuilt create_react_agent on first use"""
+    from langgraph.prebuilt import create_react_agent
+    
+    tools, prompt = AGENT_SPECS[agent_name]
+    return create_react_agent(get_model(), tools=tools, prompt=prompt)
+
+
+def make_worker_node(agent_name: str, completes: set[str]) -> RunnableLambda:
+    """
+    Graph node that runs one worker agent and marks its domains completed.
+    
+    The prebuilt agent handles all tool calling logic; the node only passes
+    the state through, with a sync and an async body.
+    """
+    def run(state: SupervisorState) -> dict:
+        result = get_agent(agent_name).invoke(state)
+        return {"messages": result["messages"], "completed": set(completes)}
+    
+    async def arun(state: SupervisorState) -> dict:
+        result = await get_agent(agent_name).ainvoke(state)
+        return {"messages": result["messages"], "completed": set(completes)}
+    
+    return RunnableLambda(run, afunc=arun, name=f"{agent_name}_agent_node")
+
+
+# Calendar agent handles scheduling tasks
+calendar_agent_node = make_worker_node("calendar", {"calendar"})
+
+# Email agent handles email tasks
+email_agent_node = make_worker_node("email", {"email"})
 
-def email_agent_node(state: SupervisorState) -> dict:
-    """Email agent handles email tasks"""
-    # Invoke the prebuilt agent - it handles all tool calling logic
-    result = email_agent.invoke(state)
-    return {"messages": result["messages"]}
+# Combined agent handles requests that need both calendar and email work
+combined_agent_node = make_worker_node("combined", {"calendar", "email"})
 
 
 # ============================================================================
 # Routing Function
 # ============================================================================
 
-def route_after_supervisor(state: SupervisorState) -> Literal["calendar", "email", "__end__"]:
-    """Route to the next agent based on supervisor's decision"""
-    next_agent = state.get("next_agent", "FINISH")
+def route_after_supervisor(state: SupervisorState) -> list[Send] | Literal["__end__"]:
+    """
+    Fan out to every agent the supervisor picked.
     
-    if next_agent == "calendar":
-        return "calendar"
-    elif next_agent == "email":
-        return "email"
-    else:
-        return "__end__"
+    Each Send becomes its own task in the same superstep, so calendar and
+    email run concurrently and both report back before the supervisor runs
+    again. No agents means the supervisor is done.
+    """
+    next_agents = state.get("next_agents") or []
+    if not next_agents:
+        return END
+    return [Send(agent, state) for agent in next_agents]
 
 
 # ============================================================================
@@ -216,9 +629,10 @@ def create_supervisor_graph():
     workflow = StateGraph(SupervisorState)
     
     # Add nodes
-    workflow.add_node("supervisor", supervisor_node)
+    workflow.add_node("supervisor", RunnableLambda(supervisor_node, afunc=asupervisor_node))
     workflow.add_node("calendar", calendar_agent_node)
     workflow.add_node("email", email_agent_node)
+    workflow.add_node("combined", combined_agent_node)
     
     # Set entry point
     workflow.add_edge(START, "supervisor")
@@ -227,16 +641,13 @@ def create_supervisor_graph():
     workflow.add_conditional_edges(
         "supervisor",
         route_after_supervisor,
-        {
-            "calendar": "calendar",
-            "email": "email",
-            "__end__": END
-        }
+        ["calendar", "email", "combined", END]
     )
     
     # Worker agents return to supervisor
     workflow.add_edge("calendar", "supervisor")
     workflow.add_edge("email", "supervisor")
+    workflow.add_edge("combined", "supervisor")
     
     return workflow.compile()
 
@@ -245,32 +656,41 @@ def create_supervisor_graph():
 # Export Graph for LangGraph Server
 # ============================================================================
 
-# This is used by langgraph.json to expose the graph
-graph = create_supervisor_graph()
+# langgraph.json loads create_supervisor_graph directly; `from main import
+# graph` still works, but builds the graph (and its models) on first access
+@functools.lru_cache(maxsize=1)
+def get_graph():
+    """Compiled supervisor graph, built once on first use"""
+    return create_supervisor_graph()
+
+
+def __getattr__(name: str):
+    if name == "graph":
+        return get_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # ============================================================================
 # Example Usage
 # ============================================================================
 
-def run_example_1():
+async def run_example_1():
     """Example 1: Simple single-domain request (calendar only)"""
     print("\n" + "="*80)
     print("EXAMPLE 1: Simple calendar request")
     print("="*80 + "\n")
 
-    supervisor = create_supervisor_graph()
     query = "Schedule a team standup for tomorrow at 9am"
 
     print(f"User Request: {query}\n")
     print("Supervisor coordinating with calendar agent...\n")
 
-    for chunk in supervisor.stream(
+    async for chunk in get_graph().astream(
         {"messages": [HumanMessage(content=query)]}
     ):
         for node_name, node_update in chunk.items():
             print(f"Update from {node_name}:")
-            for message in node_update["messages"][-1:]:  # Show only latest message
+            for message in node_update.get("messages", [])[-1:]:  # Show only latest message
                 if hasattr(message, 'pretty_print'):
                     message.pretty_print()
                 else:
@@ -278,13 +698,12 @@ def run_example_1():
             print()
 
 
-def run_example_2():
+async def run_example_2():
     """Example 2: Complex multi-domain request (calendar + email)"""
     print("\n" + "="*80)
     print("EXAMPLE 2: Complex multi-domain request")
     print("="*80 + "\n")
 
-    supervisor = create_supervisor_graph()
     query = (
         "Schedule a meeting with the design team next Tuesday at 2pm for 1 hour, "
         "and send them an email reminder about reviewing the new mockups."
@@ -293,12 +712,12 @@ def run_example_2():
     print(f"User Request: {query}\n")
     print("Supervisor coordinating between calendar and email agents...\n")
 
-    for chunk in supervisor.stream(
+    async for chunk in get_graph().astream(
         {"messages": [HumanMessage(content=query)]}
     ):
         for node_name, node_update in chunk.items():
             print(f"Update from {node_name}:")
-            for message in node_update["messages"][-1:]:  # Show only latest message
+            for message in node_update.get("messages", [])[-1:]:  # Show only latest message
                 if hasattr(message, 'pretty_print'):
                     message.pretty_print()
                 else:
@@ -306,15 +725,42 @@ def run_example_2():
             print()
 
 
-def run_interactive():
+# Requests in flight at once in run_batch; keeps a large batch under the
+# provider's rate limits
+BATCH_CONCURRENCY = 16
+
+
+async def run_batch(queries: list[str], max_concurrency: int = BATCH_CONCURRENCY) -> list[dict]:
+    """
+    Run many independent requests through the supervisor concurrently.
+    
+    Each query gets its own thread_id, and results come back in the order
+    of `queries`. Useful for evals and benchmarks, where running the graph
+    once per query in a loop leaves the model API idle between calls.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+    
+    async def run_one(index: int, query: str) -> dict:
+        async with semaphore:
+            return await get_graph().ainvoke(
+                {"messages": [HumanMessage(content=query)]},
+                {"configurable": {"thread_id": f"batch-{index}"}},
+            )
+    
+    return await asyncio.gather(*(run_one(i, query) for i, query in enumerate(queries)))
+
+
+# Nodes whose LLM tokens are streamed to the terminal in interactive mode
+WORKER_NODES = ("calendar", "email", "combined")
+
+
+async def run_interactive():
     """Interactive mode - chat with the supervisor"""
     print("\n" + "="*80)
     print("INTERACTIVE MODE")
     print("="*80)
     print("Chat with your LangGraph supervisor! (Type 'quit' to exit)\n")
 
-    supervisor = create_supervisor_graph()
-
     while True:
         user_input = input("You: ").strip()
         if user_input.lower() in ['quit', 'exit', 'q']:
@@ -325,19 +771,39 @@ def run_interactive():
             continue
 
         print("\nSupervisor coordinating agents...\n")
-        for chunk in supervisor.stream(
-            {"messages": [HumanMessage(content=user_input)]}
+        final_reply = None
+        streaming_from = None
+        # "messages" carries worker tokens as they are generated; "updates"
+        # still carries each node's result for the final reply
+        async for mode, data in get_graph().astream(
+            {"messages": [HumanMessage(content=user_input)]},
+            stream_mode=["messages", "updates"],
         ):
-            for node_name, node_update in chunk.items():
-                # Only show final responses from the supervisor
-                if node_name == "supervisor" and node_update["messages"]:
+            if mode == "messages":
+                token, metadata = data
+                node_name = metadata.get("langgraph_checkpoint_ns", "").split(":")[0]
+                if node_name in WORKER_NODES and token.content:
+                    if node_name != streaming_from:
+                        streaming_from = node_name
+                        print(f"\n{node_name.title()} agent: ", end="")
+                    print(token.content, end="", flush=True)
+                continue
+            for node_name, node_update in data.items():
+                # Keep the latest reply; the keyword router finishes without
+                # a supervisor message, so it may come from a worker
+                if node_update and node_update.get("messages"):
                     latest_message = node_update["messages"][-1]
                     if hasattr(latest_message, 'content') and latest_message.content:
-                        print(f"Supervisor: {latest_message.content}")
+                        final_reply = latest_message.content
+        if streaming_from:
+            print()
+        elif final_reply:
+            # Nothing was streamed (e.g. only the supervisor replied)
+            print(f"Supervisor: {final_reply}")
         print()
 
 
-def main():
+async def main():
     """Main entry point"""
     print("\n🤖 LangGraph Supervisor Agent Demo")
     print("=" * 80)
@@ -360,19 +826,19 @@ def main():
     choice = input("\nEnter choice (1-4): ").strip()
 
     if choice == "1":
-        run_example_1()
+        await run_example_1()
     elif choice == "2":
-        run_example_2()
+        await run_example_2()
     elif choice == "3":
-        run_interactive()
+        await run_interactive()
     elif choice == "4":
-        run_example_1()
-        run_example_2()
+        await run_example_1()
+        await run_example_2()
     else:
         print("Invalid choice. Running all examples...")
-        run_example_1()
-        run_example_2()
+        await run_example_1()
+        await run_example_2()
 
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
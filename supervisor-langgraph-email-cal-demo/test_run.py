@@ -1,26 +1,70 @@
-"""Quick test script to verify the supervisor works"""
-from main import create_supervisor_graph
+"""
+Quick test script to verify the supervisor works
+
+Usage:
+    python test_run.py                   # run the built-in test queries
+    python test_run.py "query" [...]     # run only the given queries
+"""
+import asyncio
+import os
+import sys
+
+from main import graph
 from langchain_core.messages import HumanMessage
 
-print("Testing supervisor graph...")
-supervisor = create_supervisor_graph()
-
-query = "Schedule a team standup for tomorrow at 9am"
-print(f"\nQuery: {query}\n")
-
-try:
-    for chunk in supervisor.stream(
-        {"messages": [HumanMessage(content=query)]}
-    ):
-        for node_name, node_update in chunk.items():
-            print(f"✓ Node '{node_name}' executed")
-            if node_update.get("messages"):
-                last_msg = node_update["messages"][-1]
-                if hasattr(last_msg, 'content') and last_msg.content:
-                    print(f"  Content: {last_msg.content[:100]}...")
-    
-    print("\n✅ Test completed successfully!")
-except Exception as e:
-    print(f"\n❌ Error: {e}")
-    import traceback
-    traceback.print_exc()
+# One single-domain and one multi-domain request; they share no state, so
+# they run concurrently (at most TEST_CONCURRENCY at a time)
+TEST_QUERIES = (
+    "Schedule a team standup for tomorrow at 9am",
+    "Schedule a meeting with the design team next Tuesday at 2pm for 1 hour, "
+    "and send them an email reminder about reviewing the new mockups.",
+)
+TEST_CONCURRENCY = int(os.getenv("TEST_CONCURRENCY", "8"))
+
+
+async def run_query(query: str, semaphore: asyncio.Semaphore) -> list[str]:
+    """Run one query and return its report lines (printed later, in order)"""
+    lines = [f"\nQuery: {query}\n"]
+    # Read tool names off the agents' tool calls instead of guessing from reply text
+    tools_used = set()
+    async with semaphore:
+        async for chunk in graph.astream(
+            {"messages": [HumanMessage(content=query)]}
+        ):
+            for node_name, node_update in chunk.items():
+                lines.append(f"✓ Node '{node_name}' executed")
+                if node_update.get("messages"):
+                    last_msg = node_update["messages"][-1]
+                    if hasattr(last_msg, 'content') and last_msg.content:
+                        lines.append(f"  Content: {last_msg.content[:100]}...")
+                    for message in node_update["messages"]:
+                        tools_used.update(call["name"] for call in getattr(message, "tool_calls", None) or ())
+    lines.append(f"Tools used: {', '.join(sorted(tools_used)) or 'none'}")
+    return lines
+
+
+async def run_test(queries: tuple[str, ...] = TEST_QUERIES):
+    print("Testing supervisor graph...")
+
+    semaphore = asyncio.Semaphore(TEST_CONCURRENCY)
+    results = await asyncio.gather(
+        *(run_query(query, semaphore) for query in queries),
+        return_exceptions=True,
+    )
+
+    failed = False
+    for query, result in zip(queries, results):
+        if isinstance(result, Exception):
+            failed = True
+            print(f"\nQuery: {query}\n")
+            print(f"❌ Error: {result}")
+            import traceback
+            traceback.print_exception(result)
+        else:
+            print("\n".join(result))
+
+    if not failed:
+        print("\n✅ Test completed successfully!")
+
+
+asyncio.run(run_test(tuple(sys.argv[1:]) or TEST_QUERIES))